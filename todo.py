@@ -1,6 +1,9 @@
 import argparse
 import cmd
 import datetime
+import functools
+import heapq
+import os
 import re
 import shlex
 import sys
@@ -12,27 +15,60 @@ from dateutil.relativedelta import relativedelta
 from pydrive.auth import GoogleAuth
 from pydrive.drive import GoogleDrive
 
+# Use the libyaml-backed loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
 
-# Utility function to read the configuration from a YAML file
-def get_config():
-    with open("settings.yaml", 'r') as stream:
+# Matches a due date given as a number of weeks, e.g. '2w'
+_RE_WEEKS = re.compile(r'\A\d+w\Z')
+
+
+# Parse a YAML file once per (path, mtime, size); a changed file gets a new cache key
+@functools.lru_cache(maxsize=8)
+def _load_yaml(path, mtime_ns, size):
+    with open(path, 'r') as stream:
         try:
-            return yaml.safe_load(stream)
+            return yaml.load(stream, Loader=_Loader)
         except yaml.YAMLError as exc:
             print(exc)
 
 
+# Utility function to read the configuration from a YAML file
+def get_config(path="settings.yaml"):
+    st = os.stat(path)
+    return _load_yaml(path, st.st_mtime_ns, st.st_size)
+
+
+# Parse a 'YYYY-MM-DD' string by slicing, avoiding the overhead of strptime;
+# anything else (e.g. hand-edited '2024-1-5') goes through strptime as before
+def _fast_date(s):
+    if len(s) == 10 and s[4] == s[7] == '-':
+        return datetime.datetime(int(s[:4]), int(s[5:7]), int(s[8:10]))
+    return datetime.datetime.strptime(s, Task.DATE_FORMAT)
+
+
+# Format a date as 'YYYY-MM-DD' without going through strftime
+def _format_date(d):
+    return f'{d.year:04d}-{d.month:02d}-{d.day:02d}'
+
+
 class Task:
     """
     The Task class represents a task with its various attributes including
     its state, name, priority, initialization date, and due date.
     """
 
+    # Store attributes in fixed slots instead of a per-instance __dict__
+    __slots__ = ('id', 'name', 'priority', 'init_date', '_due_date', 'due_day', 'state',
+                 '_init_date_str', '_due_date_str')
+
     # Define constants for task states
     STATE_TODO = 'TODO'
     STATE_DONE = 'DONE'
 
-    # Define a date format constant for string-date conversions
+    # Date format of the task file; _fast_date parses with it when a date is not zero-padded
     DATE_FORMAT = '%Y-%m-%d'
 
     def __init__(self, id, name, priority, init_date, due_date=None, state=STATE_TODO):
@@ -45,6 +81,30 @@ class Task:
         self.init_date = init_date  # The task initialization date
         self.due_date = due_date  # The task due date (optional)
         self.state = state  # The task state (default is 'TODO')
+        self._init_date_str = _format_date(init_date)  # Formatted once, the init date never changes
+
+    @property
+    def due_date(self):
+        """
+        The task due date (optional).
+        """
+        return self._due_date
+
+    @due_date.setter
+    def due_date(self, value):
+        # Drop the cached string so it is re-formatted on the next write
+        self._due_date = value
+        self._due_date_str = None
+        # Keep the calendar day of the due date for date comparisons
+        self.due_day = value.date() if value else None
+
+    def due_date_str(self):
+        """
+        Return the due date as a string, or 'None' if there is no due date.
+        """
+        if self._due_date_str is None:
+            self._due_date_str = _format_date(self._due_date) if self._due_date else 'None'
+        return self._due_date_str
 
     @classmethod
     def from_string(cls, line):
@@ -56,8 +116,8 @@ class Task:
         id, priority, init_date, due_date_str, state, name = parts
 
         # Convert string dates to datetime objects
-        init_date = datetime.datetime.strptime(init_date, cls.DATE_FORMAT)
-        due_date = datetime.datetime.strptime(due_date_str, cls.DATE_FORMAT) if due_date_str != 'None' else None
+        init_date = _fast_date(init_date)
+        due_date = _fast_date(due_date_str) if due_date_str != 'None' else None
 
         # Convert priority to integer
         priority = int(priority)
@@ -69,21 +129,15 @@ class Task:
         """
         Converts a Task object into a string format.
         """
-        # If due date is present, convert it to string; if not, use 'None'
-        due_date_str = self.due_date.strftime(self.DATE_FORMAT) if self.due_date else 'None'
-
         # Return the string representation of the Task object
-        return f'{self.id} {self.priority} {self.init_date.strftime(self.DATE_FORMAT)} {due_date_str} {self.state} {self.name}'
+        return f'{self.id} {self.priority} {self._init_date_str} {self.due_date_str()} {self.state} {self.name}'
 
     def to_string_short(self):
         """
         Converts a Task object into a string format.
         """
-        # If due date is present, convert it to string; if not, use 'None'
-        due_date_str = self.due_date.strftime(self.DATE_FORMAT) if self.due_date else 'None'
-
         # Return the string representation of the Task object
-        return f'{self.id} {self.priority} {due_date_str} {self.name}'
+        return f'{self.id} {self.priority} {self.due_date_str()} {self.name}'
 
 
 class TodoList:
@@ -102,14 +156,18 @@ class TodoList:
         gauth.LocalWebserverAuth()  # Creates local webserver and auto handles authentication.
         self.drive = GoogleDrive(gauth)  # Get access to Google Drive
         self.file_id = file_id  # Store the ID of the file where the tasks are stored
+        self._file = self.drive.CreateFile({'id': file_id})  # File handle reused for every read and write
         self.tasks = self.read_tasks()  # Read tasks from the file into memory
+        self._dirty = False  # Whether tasks in memory differ from the file
 
     def read_tasks(self):
         """
         Read tasks from the Google Drive file and return them as a list of Task objects.
         """
-        # Create a file object with the given ID
-        file = self.drive.CreateFile({'id': self.file_id})
+        file = self._file
+
+        # Fetch only the metadata fields needed to decide how to download the content
+        file.FetchMetadata(fields='mimeType,downloadUrl,exportLinks')
 
         # If the file is a Google Docs document, export it; otherwise, download it
         if 'application/vnd.google-apps.document' in file['mimeType']:
@@ -117,26 +175,49 @@ class TodoList:
         else:
             content = file.GetContentString()
 
-        # Parse each line of the file content into a Task object and store them in a list
-        tasks = []
-        for line in content.splitlines():
-            task = Task.from_string(line)
-            tasks.append(task)
+        # Parse each non-empty line of the file content into a Task object and store them in a list
+        tasks = [Task.from_string(line) for line in content.splitlines() if line.strip()]
+
+        # Drop the downloaded body the cached file handle would otherwise keep for the list's lifetime
+        file.content = None
+
+        # Index the tasks by ID for constant-time lookups
+        self._by_id = self._index_tasks(tasks)
         return tasks
 
+    @staticmethod
+    def _index_tasks(tasks):
+        """
+        Map task IDs to tasks. If several tasks share an ID, the first one wins.
+        """
+        by_id = {}
+        for task in tasks:
+            by_id.setdefault(task.id, task)
+        return by_id
+
     def write_tasks(self):
         """
         Write tasks from memory back to the Google Drive file.
         """
-        # Create a file object with the given ID
-        file = self.drive.CreateFile({'id': self.file_id})
+        file = self._file
 
         # Convert each task to a string and join them with newline characters
         content = "\n".join(task.to_string() for task in self.tasks)
 
+        # Upload as plain text, as a fresh file handle would, even if the file is a Google Docs document
+        file['mimeType'] = 'text/plain'
+
         # Write the task strings to the file and upload the file
         file.SetContentString(content)
         file.Upload()
+        self._dirty = False
+
+    def flush(self):
+        """
+        Write tasks back to the Google Drive file if they were modified since the last write.
+        """
+        if self._dirty:
+            self.write_tasks()
 
     def calculate_due_date(self, due_date):
         """
@@ -165,7 +246,7 @@ class TodoList:
 
     def add_task(self, name, due_date=None, priority=5):
         """
-        Add a task to the list and write the updated list to the file.
+        Add a task to the list and mark the list as modified.
         """
         # Calculate the due date based on the provided description
         due_date = self.calculate_due_date(due_date)
@@ -175,29 +256,27 @@ class TodoList:
                         init_date=datetime.datetime.now(), due_date=due_date,
                         state=Task.STATE_TODO)
 
-        # Append the new task to the list and write the updated list to the file
+        # Append the new task to the list and mark the list as modified
         self.tasks.append(new_task)
-        self.write_tasks()
+        self._by_id.setdefault(new_task.id, new_task)
+        self._dirty = True
 
     def mark_task_done(self, task_id):
         """
-        Mark a task as done and write the updated list to the file.
+        Mark a task as done and mark the list as modified.
         """
-        # Iterate over the tasks
-        for task in self.tasks:
-            # If a task with the given ID is found, mark it as done and update its due date
-            if task.id == int(task_id):
-                task.state = Task.STATE_DONE
-                task.due_date = datetime.datetime.now()
-
-                # Write the updated list to the file
-                self.write_tasks()
-
-                # Exit the method
-                return
+        # Look up the task by its ID
+        task = self._by_id.get(int(task_id))
 
         # If no task with the given ID is found, print a message
-        print(f"No task found with ID {task_id}")
+        if task is None:
+            print(f"No task found with ID {task_id}")
+            return
+
+        # Mark the task as done, update its due date and mark the list as modified
+        task.state = Task.STATE_DONE
+        task.due_date = datetime.datetime.now()
+        self._dirty = True
 
     def list_tasks(self):
         """
@@ -213,27 +292,30 @@ class TodoList:
 
     def renumber_tasks(self):
         """
-        Renumber tasks based on their current order and write the updated list to the file.
+        Renumber tasks based on their current order and mark the list as modified.
         """
         # Sort tasks by whether they're done and their initialization date, and then renumber them
         self.tasks.sort(key=lambda t: (t.state == Task.STATE_DONE, t.init_date))
         for i, task in enumerate(self.tasks, start=1):
-            task.id = str(i)
+            task.id = i
+        self._by_id = self._index_tasks(self.tasks)
 
-        # Write the updated list to the file
-        self.write_tasks()
+        # Mark the list as modified
+        self._dirty = True
 
     def top_tasks(self):
         """
         Print the top 5 tasks that are either high-priority or due today or earlier.
         """
         # Filter the tasks to get only the ones that are not done and either high-priority or due today or earlier
-        tasks = sorted((t for t in self.tasks if t.state == Task.STATE_TODO and
-                        (t.priority == 1 or (t.due_date and t.due_date.date() <= datetime.datetime.today().date()))),
-                       key=lambda t: t.priority, reverse=True)
+        today = datetime.date.today()
+        # Select the first 5 by priority without sorting the whole list
+        tasks = heapq.nlargest(5, (t for t in self.tasks if t.state == Task.STATE_TODO and
+                                   (t.priority == 1 or (t.due_day and t.due_day <= today))),
+                               key=lambda t: t.priority)
 
         # Print the first 5 tasks
-        for task in tasks[:5]:
+        for task in tasks:
             print(task.to_string_short())
 
     def list_completed_today(self):
@@ -241,8 +323,9 @@ class TodoList:
         Print all tasks that were completed today.
         """
         # Filter the tasks to get only the ones that were completed today
+        today = datetime.date.today()
         tasks = [t for t in self.tasks if
-                 t.state == Task.STATE_DONE and t.due_date.date() == datetime.datetime.today().date()]
+                 t.state == Task.STATE_DONE and t.due_day == today]
 
         # Print each task
         for task in tasks:
@@ -250,30 +333,27 @@ class TodoList:
 
     def postpone_task(self, task_id, duration):
         """
-        Postpone a task's due date by a certain duration and write the updated list to the file.
+        Postpone a task's due date by a certain duration and mark the list as modified.
         """
-        # Iterate over the tasks
-        for task in self.tasks:
-            # If a task with the given ID is found, postpone its due date
-            task_id = int(task_id)
-            if task.id == task_id:
-                # If the duration is in weeks, postpone the due date by that number of weeks
-                if duration[-1].lower() == 'w':
-                    weeks = int(duration[:-1])
-                    task.due_date += datetime.timedelta(weeks=weeks)
-                # If the duration is in days, postpone the due date by that number of days
-                elif duration[-1].lower() == 'd':
-                    days = int(duration[:-1])
-                    task.due_date += datetime.timedelta(days=days)
-
-                # Write the updated list to the file
-                self.write_tasks()
-
-                # Exit the method
-                return
+        # Look up the task by its ID
+        task = self._by_id.get(int(task_id))
 
         # If no task with the given ID is found, print a message
-        print(f"No task found with ID {task_id}")
+        if task is None:
+            print(f"No task found with ID {task_id}")
+            return
+
+        # If the duration is in weeks, postpone the due date by that number of weeks
+        if duration[-1].lower() == 'w':
+            weeks = int(duration[:-1])
+            task.due_date += datetime.timedelta(weeks=weeks)
+        # If the duration is in days, postpone the due date by that number of days
+        elif duration[-1].lower() == 'd':
+            days = int(duration[:-1])
+            task.due_date += datetime.timedelta(days=days)
+
+        # Mark the list as modified
+        self._dirty = True
 
     def prune(self):
         """
@@ -285,25 +365,31 @@ class TodoList:
         # Define a timedelta for one month ago
         one_month_ago = now - timedelta(days=30)
 
-        # Create a new list with the tasks we want to keep
-        self.tasks = [task for task in self.tasks
-                      if not (task.state == "DONE" and task.due_date < one_month_ago)]
+        # Find the positions of done tasks that were completed over a month ago
+        to_remove = frozenset(i for i, task in enumerate(self.tasks)
+                              if task.state == Task.STATE_DONE and task.due_date and task.due_date < one_month_ago)
+
+        # Only rebuild the list and mark it as modified if there is something to remove
+        if to_remove:
+            self.tasks = [task for i, task in enumerate(self.tasks) if i not in to_remove]
+            self._by_id = self._index_tasks(self.tasks)
+            self._dirty = True
 
         # Inform the user that pruning is completed
         print('Pruned tasks.')
 
     def modify_task(self, task_id, priority=None, due_date=None):
-        for task in self.tasks:
-            if task.id == int(task_id):  # Make sure to compare with the same type
-                # only change the value if a new one is provided
-                if priority is not None:
-                    task.priority = priority
-                if due_date is not None:
-                    due_date = self.calculate_due_date(due_date)
-                    task.due_date = due_date
-                self.write_tasks()
-                return
-        print(f"No task found with ID {task_id}")
+        task = self._by_id.get(int(task_id))  # Make sure to look up with the same type
+        if task is None:
+            print(f"No task found with ID {task_id}")
+            return
+        # only change the value if a new one is provided
+        if priority is not None:
+            task.priority = priority
+        if due_date is not None:
+            due_date = self.calculate_due_date(due_date)
+            task.due_date = due_date
+        self._dirty = True
 
 
 class TodoShell(cmd.Cmd):
@@ -318,13 +404,63 @@ class TodoShell(cmd.Cmd):
         # Initializing the parent class
         super().__init__()
 
-        # Create a TodoList instance using a specific Google Drive file ID
-
         # Get configuration from settings.yaml
         config = get_config()
 
-        # Create a TodoList instance
-        self.todo_list = TodoList(config['file_id'])
+        # Store the Google Drive file ID; the TodoList is created on first use
+        self._file_id = config['file_id']
+        self._todo_list = None
+
+        # Map command names to their handlers once instead of looking them up per command
+        self._cmds = {name[3:]: getattr(self, name) for name in dir(self) if name.startswith('do_')}
+
+        # Build the argument parsers for the add and modify commands once
+        self._add_parser = argparse.ArgumentParser()
+        self._add_parser.add_argument("name", nargs='+')
+        self._add_parser.add_argument("-d", "--due_date",
+                                      help="Due date for the task. Format: 'today', 'tomorrow', '1w', or 'YYYY-MM-DD'. Default is '1w'",
+                                      default='0d')
+        self._add_parser.add_argument("-p", "--priority", type=int, choices=range(1, 6),
+                                      help="Priority of the task. Must be an integer between 1 (highest) and 5 (lowest). Default is 5.",
+                                      default=5)
+
+        self._modify_parser = argparse.ArgumentParser()
+        self._modify_parser.add_argument("name", nargs='+')
+        self._modify_parser.add_argument("-d", "--due_date", default=None,
+                                         help="Due date for the task. Format: 'today', 'tomorrow', '1w', or 'YYYY-MM-DD'. If not provided, the due date remains unchanged.")
+        self._modify_parser.add_argument("-p", "--priority", type=int, choices=range(1, 6), default=None,
+                                         help="Priority of the task. Must be an integer between 1 (highest) and 5 (lowest). If not provided, the priority remains unchanged.")
+
+    @property
+    def todo_list(self):
+        """
+        The TodoList instance, authenticated and loaded the first time a command needs it.
+        """
+        if self._todo_list is None:
+            self._todo_list = TodoList(self._file_id)
+        return self._todo_list
+
+    def onecmd(self, line):
+        """
+        Run a single command, then write any modified tasks back to the file in one upload.
+        """
+        try:
+            # Same handling as cmd.Cmd.onecmd, but dispatching through the command table
+            command, arg, line = self.parseline(line)
+            if not line:
+                return self.emptyline()
+            if command is None:
+                return self.default(line)
+            self.lastcmd = line
+            if line == 'EOF':
+                self.lastcmd = ''
+            func = self._cmds.get(command)
+            if func is None:
+                return self.default(line)
+            return func(arg)
+        finally:
+            if self._todo_list is not None:
+                self._todo_list.flush()
 
     def do_add(self, arg):
         """
@@ -390,10 +526,8 @@ class TodoShell(cmd.Cmd):
         Command to remove tasks in state DONE that are older than 1 month.
         Format: PRUNE
         """
-        # Prune the tasks and write the updated list to the file
+        # Prune the tasks; the updated list is written when the command finishes
         self.todo_list.prune()
-        self.todo_list.write_tasks()
-
 
     def do_modify(self, arg):
         'Modify an existing task: modify "TASK_ID" [-d DUE_DATE] [-p PRIO]'
@@ -422,29 +556,12 @@ class TodoShell(cmd.Cmd):
         """
         Parse the arguments given to the add command.
         """
-        parser = argparse.ArgumentParser()
-
-        # Add arguments for task name, due date, and priority
-        parser.add_argument("name", nargs='+')
-        parser.add_argument("-d", "--due_date",
-                            help="Due date for the task. Format: 'today', 'tomorrow', '1w', or 'YYYY-MM-DD'. Default is '1w'",
-                            default='0d')
-        parser.add_argument("-p", "--priority", type=int, choices=range(1, 6),
-                            help="Priority of the task. Must be an integer between 1 (highest) and 5 (lowest). Default is 5.",
-                            default=5)
-
         # Parse the arguments and return the task name, due date, and priority
-        args = parser.parse_args(shlex.split(arg))
+        args = self._add_parser.parse_args(shlex.split(arg))
         return ' '.join(args.name), args.due_date, args.priority
 
     def parse_modify_args(self, arg):
-        parser = argparse.ArgumentParser()
-        parser.add_argument("name", nargs='+')
-        parser.add_argument("-d", "--due_date", default=None,
-                            help="Due date for the task. Format: 'today', 'tomorrow', '1w', or 'YYYY-MM-DD'. If not provided, the due date remains unchanged.")
-        parser.add_argument("-p", "--priority", type=int, choices=range(1, 6), default=None,
-                            help="Priority of the task. Must be an integer between 1 (highest) and 5 (lowest). If not provided, the priority remains unchanged.")
-        args = parser.parse_args(shlex.split(arg))
+        args = self._modify_parser.parse_args(shlex.split(arg))
         return ' '.join(args.name), args.due_date, args.priority
 
     def default(self, line):
@@ -516,36 +633,40 @@ if __name__ == '__main__':
         todo_list = TodoList(config['file_id'])
 
         # Call appropriate function based on the command
-        if args.command == 'done':
-            for task_id in args.task_name:  # iterate over each task ID
-                todo_list.mark_task_done(task_id)
-        elif args.command == 'add':
-            # Parse the due date
-            if args.due_date:
-                if args.due_date.lower() == 'today':
-                    due_date = datetime.datetime.today()
-                elif args.due_date.lower() == 'tomorrow':
-                    due_date = datetime.datetime.today() + datetime.timedelta(days=1)
-                elif re.match(r'^\d+w$', args.due_date.lower()):
-                    weeks = int(args.due_date[:-1])
-                    due_date = datetime.datetime.today() + relativedelta(weeks=+weeks)
+        try:
+            if args.command == 'done':
+                for task_id in args.task_name:  # iterate over each task ID
+                    todo_list.mark_task_done(task_id)
+            elif args.command == 'add':
+                # Parse the due date
+                if args.due_date:
+                    if args.due_date.lower() == 'today':
+                        due_date = datetime.datetime.today()
+                    elif args.due_date.lower() == 'tomorrow':
+                        due_date = datetime.datetime.today() + datetime.timedelta(days=1)
+                    elif _RE_WEEKS.match(args.due_date.lower()):
+                        weeks = int(args.due_date[:-1])
+                        due_date = datetime.datetime.today() + relativedelta(weeks=+weeks)
+                    else:
+                        due_date = date_parse(args.due_date)
                 else:
-                    due_date = date_parse(args.due_date)
-            else:
-                due_date = None
-            todo_list.add_task(args.task_name, due_date, args.priority)
-        elif args.command == 'ls':
-            todo_list.list_tasks()
-        elif args.command == 'renumber':  # handle 'ren' command
-            todo_list.renumber_tasks()
-        elif args.command == 'top':  # handle 'top' command
-            todo_list.top_tasks()
-        elif args.command == 'modify':
-            todo_list.modify_task(args.task_id, args.due_date, args.priority)
-        elif args.command == 'completed':  # handle 'c' command
-            todo_list.list_completed_today()
-        elif args.command == 'postpone':
-            todo_list.postpone_task(args.task_id, args.duration)
+                    due_date = None
+                todo_list.add_task(args.task_name, due_date, args.priority)
+            elif args.command == 'ls':
+                todo_list.list_tasks()
+            elif args.command == 'renumber':  # handle 'ren' command
+                todo_list.renumber_tasks()
+            elif args.command == 'top':  # handle 'top' command
+                todo_list.top_tasks()
+            elif args.command == 'modify':
+                todo_list.modify_task(args.task_id, args.due_date, args.priority)
+            elif args.command == 'completed':  # handle 'c' command
+                todo_list.list_completed_today()
+            elif args.command == 'postpone':
+                todo_list.postpone_task(args.task_id, args.duration)
+        finally:
+            # Write any modified tasks back to the file, even if the command failed part way
+            todo_list.flush()
     else:
         # If no command line arguments are passed, start the command line shell
         TodoShell().cmdloop()